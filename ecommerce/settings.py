@@ -61,7 +61,7 @@ WSGI_APPLICATION = "ecommerce.wsgi.application"
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
+        conn_max_age=int(os.getenv("CONN_MAX_AGE", "600")),
         ssl_require=False,
     )
 }
@@ -86,8 +86,21 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-# Whitenoise settings for production
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Whitenoise settings for production: fingerprinted names served with
+# immutable cache headers, plus gzip (and Brotli, when installed) copies
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+# Fall back to unhashed URLs rather than erroring if collectstatic wasn't run
+WHITENOISE_MANIFEST_STRICT = False
+
+# Bundles written by `manage.py build_static` before collectstatic
+STATIC_BUILD_DIR = BASE_DIR / "static"
+STATIC_BUNDLES = {
+    "build/app.css": ["css/base.css"],
+    "build/app.js": ["js/custom.js"],
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -100,6 +113,47 @@ LOGOUT_REDIRECT_URL = "home"
 # ⚡ Razorpay (Keys from environment variables for security)
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "rzp_test_sJ29I3ZehiQfoh")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "GdH86rsTHGFUAJ8iU8all5K8")
+# Dotted path to a drop-in client class; empty means the real razorpay.Client.
+# Only honoured with LOADTEST=True: a stub client accepts forged payments
+RAZORPAY_CLIENT = os.getenv("RAZORPAY_CLIENT", "")
+LOADTEST = os.getenv("LOADTEST", "False") == "True"
 
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+# ⚡ Email (set EMAIL_BACKEND to an anymail backend in production)
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND",
+    "django.core.mail.backends.console.EmailBackend" if DEBUG else "django.core.mail.backends.smtp.EmailBackend",
+)
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "orders@shopmore.local")
+
+# ⚡ Background tasks
+# "thread" runs tasks in an in-process pool (development), "worker" leaves them
+# in the database for `manage.py run_tasks`, "immediate" runs them on commit.
+# The thread pool starts on the first enqueue and then polls for retries and
+# leftovers; in production always run `manage.py run_tasks` as well.
+TASK_BACKEND = os.getenv("TASK_BACKEND", "thread" if DEBUG else "worker")
+TASK_THREAD_WORKERS = int(os.getenv("TASK_THREAD_WORKERS", "2"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+TASK_RETRY_BACKOFF = int(os.getenv("TASK_RETRY_BACKOFF", "30"))  # seconds
+TASK_POLL_INTERVAL = float(os.getenv("TASK_POLL_INTERVAL", "5"))  # seconds
+# A running task not finished after this long is assumed lost and run again,
+# so tasks must be safe to repeat
+TASK_VISIBILITY_TIMEOUT = int(os.getenv("TASK_VISIBILITY_TIMEOUT", "600"))  # seconds
+# `run_tasks` deletes done/failed tasks this much older than their last run
+TASK_RETENTION_DAYS = int(os.getenv("TASK_RETENTION_DAYS", "14"))
+
+# Absolute base for links in emails
+SITE_URL = os.getenv(
+    "SITE_URL",
+    "https://" + os.environ["RENDER_EXTERNAL_HOSTNAME"] if os.getenv("RENDER_EXTERNAL_HOSTNAME") else "http://localhost:8000",
+)
+
+# ⚡ Cold-start budget, checked by `manage.py profile_startup` and the test suite
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+FIRST_REQUEST_BUDGET_SECONDS = float(os.getenv("FIRST_REQUEST_BUDGET_SECONDS", "1.0"))
+
+# ⚡ Admin: count at most this many rows for filtered changelists, and use the
+# database's row estimate for unfiltered tables larger than this
+ADMIN_COUNT_LIMIT = int(os.getenv("ADMIN_COUNT_LIMIT", "10000"))
@@ -1,21 +1,190 @@
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Max, Min, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
 from .models import Product, Category, Cart, Order, OrderItem
 
+
+def estimated_row_count(model, using):
+    """Row estimate from the planner statistics, or None if unavailable."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids an exact COUNT(*) over very large tables.
+
+    Unfiltered lists use the database's own row estimate. Filtered lists are
+    counted up to ADMIN_COUNT_LIMIT rows, so a broad filter costs at most a
+    bounded index scan. Either way the count may be short of the real one,
+    so pages past it are still served, and linked one page at a time.
+    """
+
+    @cached_property
+    def _counted(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate and estimate > limit:
+                return estimate, 'estimate'
+        count = queryset.values('pk')[:limit].count()
+        return count, 'capped' if count >= limit else 'exact'
+
+    @cached_property
+    def count(self):
+        return self._counted[0]
+
+    @property
+    def count_is_estimate(self):
+        return self._counted[1] == 'estimate'
+
+    @property
+    def count_is_capped(self):
+        return self._counted[1] == 'capped'
+
+    def validate_number(self, number):
+        if self._counted[1] == 'exact':
+            return super().validate_number(number)
+        # Only the lower end is known
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if self._counted[1] == 'exact':
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def get_elided_page_range(self, number=1, **kwargs):
+        number = self.validate_number(number)
+        if self._counted[1] == 'exact' or number < self.num_pages:
+            yield from super().get_elided_page_range(number, **kwargs)
+            return
+        # Past the counted pages: link the current page and the one after it
+        yield from super().get_elided_page_range(self.num_pages, **kwargs)
+        if number > self.num_pages + 1:
+            yield self.ELLIPSIS
+        yield from range(max(number, self.num_pages + 1), number + 2)
+
+
+class DateRangeQuerySet(QuerySet):
+    """Date hierarchy support without SELECT DISTINCT over the whole table.
+
+    The admin lists drill-down periods with ``dates()``/``datetimes()``, which
+    truncates every row. Here the periods come from MIN/MAX of the field
+    (two index lookups) instead; empty periods may show up as links.
+    """
+
+    def _periods(self, field_name, kind, to_value):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        first, last = bounds['first'], bounds['last']
+        if first is None:
+            return []
+        if isinstance(first, datetime) and timezone.is_aware(first):
+            first, last = timezone.localtime(first), timezone.localtime(last)
+
+        periods = []
+        if kind == 'year':
+            for year in range(first.year, last.year + 1):
+                periods.append(to_value(year, 1, 1))
+        elif kind == 'month':
+            year, month = first.year, first.month
+            while (year, month) <= (last.year, last.month):
+                periods.append(to_value(year, month, 1))
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        else:
+            day = date(first.year, first.month, first.day)
+            while day <= date(last.year, last.month, last.day):
+                periods.append(to_value(day.year, day.month, day.day))
+                day += timedelta(days=1)
+        return periods
+
+    def dates(self, field_name, kind, order='ASC'):
+        periods = self._periods(field_name, kind, date)
+        return periods[::-1] if order == 'DESC' else periods
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, **kwargs):
+        tz = tzinfo or (timezone.get_current_timezone() if settings.USE_TZ else None)
+        periods = self._periods(field_name, kind, lambda y, m, d: datetime(y, m, d, tzinfo=tz))
+        return periods[::-1] if order == 'DESC' else periods
+
+
+class LargeTableChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return DateRangeQuerySet(model=queryset.model, query=queryset.query.chain(), using=queryset.db)
+
+
+class CategoryAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('title', 'price', 'category')
     list_filter = ('category',)
+    list_select_related = ('category',)
     search_fields = ('title', 'description')
+    autocomplete_fields = ('category',)
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    autocomplete_fields = ('product',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
 
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'total_amount', 'payment_status', 'created_at')
-    list_filter = ('payment_status', 'created_at')
+    list_filter = ('payment_status',)
+    list_select_related = ('user',)
+    # Exact match only, so the lookup stays on the index
+    search_fields = ('=razorpay_order_id',)
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [OrderItemInline]
 
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'quantity', 'created_at')
+    list_select_related = ('user', 'product')
+    autocomplete_fields = ('user', 'product')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 admin.site.register(Product, ProductAdmin)
-admin.site.register(Category)
-admin.site.register(Cart)
-admin.site.register(Order, OrderAdmin)
\ No newline at end of file
+admin.site.register(Category, CategoryAdmin)
+admin.site.register(Cart, CartAdmin)
+admin.site.register(Order, OrderAdmin)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        # Register order-event consumers with the task queue
+        from . import tasks  # noqa: F401
+        from .payments import check_razorpay_client
+
+        # Fail at boot rather than on the first payment
+        check_razorpay_client()
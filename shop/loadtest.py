@@ -0,0 +1,242 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.db import connections
+
+STUB_SIGNATURE = 'stub_signature'
+
+RAZORPAY_ORDER_ID = re.compile(r'"order_id":\s*"([^"]+)"')
+
+
+class StubRazorpayClient:
+    """Offline stand-in for ``razorpay.Client`` used by load tests.
+
+    Start the server with ``LOADTEST=True`` and
+    ``RAZORPAY_CLIENT=shop.loadtest.StubRazorpayClient``; without
+    ``LOADTEST`` the server refuses the stub. Orders get a random id and
+    only ``STUB_SIGNATURE`` verifies.
+    """
+
+    def __init__(self, auth=None):
+        self.order = self
+        self.utility = self
+
+    def create(self, data):
+        return {'id': f'order_stub_{uuid.uuid4().hex[:14]}', 'amount': data.get('amount'), 'status': 'created'}
+
+    def verify_payment_signature(self, params):
+        if params.get('razorpay_signature') != STUB_SIGNATURE:
+            raise ValueError('Razorpay signature verification failed')
+        return True
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed):
+        rows = []
+        with self.lock:
+            for endpoint, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': len(values),
+                    'rps': len(values) / elapsed if elapsed else 0.0,
+                    'errors': self.errors.get(endpoint, 0),
+                    'p50': percentile(values, 50),
+                    'p90': percentile(values, 90),
+                    'p99': percentile(values, 99),
+                    'max': values[-1],
+                })
+        return rows
+
+
+class DatabaseConnectionSampler(threading.Thread):
+    """Samples how many connections the server holds open on the database."""
+
+    def __init__(self, interval=1.0, using='default'):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.using = using
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def count(self):
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            elif connection.vendor == 'mysql':
+                cursor.execute("SHOW STATUS LIKE 'Threads_connected'")
+            else:
+                return None
+            row = cursor.fetchone()
+        # Don't count the sampler's own connection
+        return int(row[-1]) - 1
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                value = self.count()
+                if value is None:
+                    return
+                self.samples.append(value)
+                self.stopped.wait(self.interval)
+        finally:
+            connections[self.using].close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=self.interval * 2)
+
+
+class Shopper(threading.Thread):
+    """One virtual shopper walking home -> product -> cart -> checkout -> payment."""
+
+    def __init__(self, base_url, session_cookie, product_ids, stats, deadline, mix,
+                 razorpay_share=0.5, think=1.0, timeout=30):
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.host = parts.netloc
+        self.cookies = dict(session_cookie)
+        self.product_ids = product_ids
+        self.stats = stats
+        self.deadline = deadline
+        self.mix = mix
+        self.razorpay_share = razorpay_share
+        self.think = think
+
+    def request(self, endpoint, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        headers['Host'] = self.host
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        while True:
+            reused = self.connection.sock is not None
+            started = time.perf_counter()
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                content = response.read()
+                break
+            except OSError as e:
+                self.connection.close()
+                # Servers drop idle keep-alive connections (gunicorn after 2s,
+                # uvicorn after 5s) and a think pause can outlast that, so
+                # retry once on a fresh connection before counting an error
+                if reused and isinstance(e, (RemoteDisconnected, BrokenPipeError, ConnectionResetError)):
+                    continue
+                self.stats.record(endpoint, time.perf_counter() - started, False)
+                return None, b''
+        self.stats.record(endpoint, time.perf_counter() - started, response.status < 400)
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status, content
+
+    def pause(self):
+        if self.think > 0:
+            time.sleep(random.expovariate(1 / self.think))
+
+    def browse(self):
+        self.request('home', 'GET', '/')
+        for _ in range(random.randint(1, 3)):
+            self.pause()
+            self.request('product_detail', 'GET', f'/product/{random.choice(self.product_ids)}/')
+
+    def shop(self):
+        self.browse()
+        self.pause()
+        self.request('add_to_cart', 'GET', f'/add-to-cart/{random.choice(self.product_ids)}/')
+        self.request('cart', 'GET', '/cart/')
+
+    def checkout(self):
+        self.shop()
+        self.pause()
+        self.request('checkout', 'GET', '/checkout/')
+        self.pause()
+
+        razorpay = random.random() < self.razorpay_share
+        csrf = self.cookies.get('csrftoken', '')
+        body = urlencode({
+            'csrfmiddlewaretoken': csrf,
+            'shipping_address': '1 Load Test Lane',
+            'payment_method': 'upi' if razorpay else 'COD',
+        })
+        status, content = self.request('process_order', 'POST', '/process-order/', body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': csrf,
+        })
+        if not razorpay or status != 200:
+            return
+
+        match = RAZORPAY_ORDER_ID.search(content.decode('utf-8', 'replace'))
+        if not match:
+            self.stats.record('payment_success', 0.0, False)
+            return
+        self.pause()
+        self.request('payment_success', 'POST', '/payment-success/', json.dumps({
+            'razorpay_order_id': match.group(1),
+            'razorpay_payment_id': f'pay_stub_{uuid.uuid4().hex[:14]}',
+            'razorpay_signature': STUB_SIGNATURE,
+        }), {'Content-Type': 'application/json'})
+
+    def run(self):
+        journeys = {'browse': self.browse, 'cart': self.shop, 'checkout': self.checkout}
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while time.monotonic() < self.deadline:
+            journeys[random.choices(names, weights)[0]]()
+            self.pause()
+        self.connection.close()
+
+
+def run_stage(base_url, sessions, product_ids, duration, mix, ramp_up=0.0, **shopper_options):
+    """Run ``len(sessions)`` shoppers for ``duration`` seconds.
+
+    Returns ``(stats, elapsed, db_connection_samples)``.
+    """
+    stats = Stats()
+    sampler = DatabaseConnectionSampler()
+    sampler.start()
+
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+    shoppers = []
+    for i, session in enumerate(sessions):
+        shopper = Shopper(base_url, session, product_ids, stats, deadline, mix, **shopper_options)
+        shoppers.append(shopper)
+        shopper.start()
+        if ramp_up:
+            time.sleep(ramp_up / len(sessions))
+    for shopper in shoppers:
+        shopper.join()
+
+    sampler.stop()
+    return stats, time.monotonic() - started, sampler.samples
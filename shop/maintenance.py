@@ -0,0 +1,34 @@
+import time
+
+
+def run_in_batches(queryset, process, batch_size=500, sleep=0.0, max_batches=None, report=None):
+    """Walk ``queryset`` in primary-key order, ``batch_size`` ids at a time.
+
+    ``process`` gets a list of ids and returns how many rows it touched. Each
+    batch is its own short transaction, and rows that were processed no longer
+    match the queryset, so an interrupted run picks up where it stopped when
+    started again. ``sleep`` pauses between batches to throttle the load.
+    Returns ``(rows, seconds)``.
+    """
+    ids_qs = queryset.order_by('pk').values_list('pk', flat=True)
+    started = time.monotonic()
+    total = 0
+    batches = 0
+    last_pk = None
+
+    while max_batches is None or batches < max_batches:
+        page = ids_qs if last_pk is None else ids_qs.filter(pk__gt=last_pk)
+        ids = list(page[:batch_size])
+        if not ids:
+            break
+        last_pk = ids[-1]
+
+        total += process(ids)
+        batches += 1
+        if report:
+            elapsed = time.monotonic() - started
+            report(batches, total, total / elapsed if elapsed else 0.0)
+        if sleep:
+            time.sleep(sleep)
+
+    return total, time.monotonic() - started
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from shop.maintenance import run_in_batches
+from shop.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+ARCHIVABLE_STATUSES = ['completed', 'confirmed']
+
+
+class Command(BaseCommand):
+    help = 'Move old completed orders into the archive tables in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=365, help='Archive orders older than this')
+        parser.add_argument('--batch', type=int, default=200, help='Orders per batch')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        orders = Order.objects.filter(payment_status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+
+        def report(batches, rows, rate):
+            self.stdout.write(f'batch {batches}, {rows} orders, {rate:.0f} orders/s')
+
+        rows, seconds = run_in_batches(
+            orders,
+            self.archive,
+            batch_size=options['batch'],
+            sleep=options['sleep'],
+            max_batches=options['max_batches'],
+            report=report,
+        )
+        rate = rows / seconds if seconds else 0.0
+        self.stdout.write(self.style.SUCCESS(f'Archived {rows} orders in {seconds:.1f}s ({rate:.0f} orders/s)'))
+
+    def archive(self, ids):
+        with transaction.atomic():
+            orders = list(Order.objects.filter(id__in=ids))
+            items = list(OrderItem.objects.filter(order_id__in=ids))
+
+            # ignore_conflicts keeps a re-run safe if a batch was half copied
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    id=order.id,
+                    user_id=order.user_id,
+                    total_amount=order.total_amount,
+                    payment_method=order.payment_method,
+                    razorpay_order_id=order.razorpay_order_id,
+                    payment_status=order.payment_status,
+                    created_at=order.created_at,
+                )
+                for order in orders
+            ], ignore_conflicts=True)
+            ArchivedOrderItem.objects.bulk_create([
+                ArchivedOrderItem(
+                    id=item.id,
+                    order_id=item.order_id,
+                    product_id=item.product_id,
+                    quantity=item.quantity,
+                    price=item.price,
+                )
+                for item in items
+            ], ignore_conflicts=True)
+
+            OrderItem.objects.filter(order_id__in=ids).delete()
+            Order.objects.filter(id__in=ids).delete()
+        return len(orders)
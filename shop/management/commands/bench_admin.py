@@ -0,0 +1,166 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.maintenance import run_in_batches
+from shop.models import Order, OrderItem
+
+BENCH_PREFIX = 'bench_'
+BENCH_ADMIN = 'admin-bench'
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic orders and time the Order admin changelist against them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders', type=int, default=None,
+            help='Synthetic orders to have in the table, e.g. 5000000. Required unless --skip-seed',
+        )
+        parser.add_argument('--users', type=int, default=1000, help='Synthetic customers to spread orders over')
+        parser.add_argument('--batch', type=int, default=10_000, help='Rows per insert batch')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed requests per page')
+        parser.add_argument('--skip-seed', action='store_true', help='Benchmark whatever is in the table')
+        parser.add_argument('--cleanup', action='store_true', help='Delete synthetic orders and users, then exit')
+        parser.add_argument(
+            '--i-know', action='store_true',
+            help='Run even though DEBUG is off, i.e. the database may be a production one',
+        )
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup(options['batch'])
+            return
+        # Seeding and the benchmark's own superuser both write to the database
+        database = settings.DATABASES['default']
+        if not settings.DEBUG and not options['i_know']:
+            raise CommandError(
+                f"DEBUG is off, so {database['ENGINE']} database '{database['NAME']}' may be production. "
+                'Point DATABASE_URL at a scratch database, or pass --i-know'
+            )
+        if not options['skip_seed']:
+            if options['orders'] is None:
+                raise CommandError('Pass --orders N to seed synthetic orders, or --skip-seed')
+            self.stdout.write(f"Seeding {options['orders']} orders into '{database['NAME']}'")
+            self.seed(options['orders'], options['users'], options['batch'])
+        self.benchmark(options['repeat'])
+
+    def seed(self, target, user_count, batch_size):
+        existing = Order.objects.filter(razorpay_order_id__startswith=BENCH_PREFIX).count()
+        missing = target - existing
+        if missing <= 0:
+            self.stdout.write(f'{existing} synthetic orders already present')
+            return
+
+        users = list(User.objects.filter(username__startswith=BENCH_PREFIX).values_list('id', flat=True))
+        if len(users) < user_count:
+            User.objects.bulk_create([
+                User(username=f'{BENCH_PREFIX}{i}', email=f'{BENCH_PREFIX}{i}@example.com')
+                for i in range(len(users), user_count)
+            ], batch_size=batch_size)
+            users = list(User.objects.filter(username__startswith=BENCH_PREFIX).values_list('id', flat=True))
+
+        statuses = ['completed'] * 7 + ['confirmed'] * 2 + ['pending', 'failed']
+        now = timezone.now()
+        span = int(timedelta(days=3 * 365).total_seconds())
+        started = time.monotonic()
+        created = 0
+
+        while created < missing:
+            size = min(batch_size, missing - created)
+            orders = [
+                Order(
+                    user_id=random.choice(users),
+                    total_amount=Decimal(random.randint(100, 500_000)) / 100,
+                    payment_method=random.choice(['COD', 'RAZORPAY']),
+                    razorpay_order_id=f'{BENCH_PREFIX}{existing + created + i}',
+                    payment_status=random.choice(statuses),
+                )
+                for i in range(size)
+            ]
+            with transaction.atomic():
+                Order.objects.bulk_create(orders, batch_size=batch_size)
+                # auto_now_add ignores explicit values, so set the dates afterwards,
+                # oldest first, in small id chunks that each get their own time
+                ids = [order.id for order in orders]
+                if None in ids:
+                    # MySQL doesn't return ids from a bulk insert
+                    ids = list(Order.objects.filter(
+                        razorpay_order_id__in=[order.razorpay_order_id for order in orders],
+                    ).order_by('id').values_list('id', flat=True))
+                for offset in range(0, len(ids), 1000):
+                    position = (existing + created + offset) / target
+                    Order.objects.filter(id__in=ids[offset:offset + 1000]).update(
+                        created_at=now - timedelta(seconds=span * (1 - position)),
+                    )
+            created += size
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'seeded {existing + created}/{target} orders ({created / elapsed:.0f} rows/s)')
+
+    def benchmark(self, repeat):
+        admin_user, _ = User.objects.get_or_create(
+            username=BENCH_ADMIN,
+            defaults={'is_staff': True, 'is_superuser': True},
+        )
+        client = Client()
+        client.force_login(admin_user)
+        try:
+            self.time_pages(client, repeat)
+        finally:
+            # Don't leave a passwordless superuser or its session behind
+            client.logout()
+            admin_user.delete()
+
+    def time_pages(self, client, repeat):
+        changelist = reverse('admin:shop_order_changelist')
+        latest = Order.objects.order_by('-created_at').first()
+        pages = [
+            ('changelist', changelist),
+            ('filter status', f'{changelist}?payment_status__exact=completed'),
+            ('page 100', f'{changelist}?p=100'),
+            ('search id', f'{changelist}?q={BENCH_PREFIX}1'),
+        ]
+        if latest:
+            created = timezone.localtime(latest.created_at)
+            pages += [
+                ('drill year', f'{changelist}?created_at__year={created.year}'),
+                ('drill month', f'{changelist}?created_at__year={created.year}&created_at__month={created.month}'),
+                ('change form', reverse('admin:shop_order_change', args=[latest.id])),
+            ]
+
+        self.stdout.write(f'\nOrders in table: {Order.objects.count()}')
+        self.stdout.write(f"{'page':<16} {'status':>6} {'queries':>8} {'best ms':>9} {'worst ms':>9}")
+        for label, url in pages:
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{label:<16} {response.status_code:>6} {len(queries):>8} '
+                f'{min(timings):>9.1f} {max(timings):>9.1f}'
+            )
+
+    def cleanup(self, batch_size):
+        def delete_orders(ids):
+            with transaction.atomic():
+                OrderItem.objects.filter(order_id__in=ids).delete()
+                deleted, _ = Order.objects.filter(id__in=ids).delete()
+            return deleted
+
+        orders = Order.objects.filter(razorpay_order_id__startswith=BENCH_PREFIX)
+        rows, seconds = run_in_batches(orders, delete_orders, batch_size=batch_size)
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        User.objects.filter(username=BENCH_ADMIN).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {rows} synthetic orders in {seconds:.1f}s'))
@@ -0,0 +1,21 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from shop.static_build import write_bundles
+
+
+class Command(BaseCommand):
+    help = 'Bundle and minify app CSS/JS, then collect, fingerprint and precompress static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-collect', action='store_true', help='Only write the bundles')
+
+    def handle(self, *args, **options):
+        for name, original, minified in write_bundles():
+            self.stdout.write(f'{name}: {original} -> {minified} bytes')
+
+        if not options['no_collect']:
+            # CompressedManifestStaticFilesStorage hashes names and writes .gz/.br copies
+            call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+
+        self.stdout.write(self.style.SUCCESS('Static build complete'))
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from shop.loadtest import run_stage
+from shop.models import Product
+
+USER_PREFIX = 'loadtest_'
+DEFAULT_MIX = 'browse=60,cart=25,checkout=15'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('browse', 'cart', 'checkout') or not weight.isdigit():
+            raise CommandError(f"Bad --mix entry '{part}', expected e.g. {DEFAULT_MIX}")
+        mix[name] = int(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Drive concurrent virtual shoppers against a running server and report throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to test (WSGI or ASGI)')
+        parser.add_argument(
+            '--shoppers', default='20',
+            help='Concurrent shoppers; a comma list (e.g. 10,20,40) runs one stage per value',
+        )
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds per stage')
+        parser.add_argument('--ramp-up', type=float, default=5.0, help='Seconds to start all shoppers')
+        parser.add_argument('--think', type=float, default=1.0, help='Mean think time between steps, in seconds')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Journey weights: browse, cart, checkout')
+        parser.add_argument('--razorpay-share', type=float, default=0.5, help='Share of checkouts paid by Razorpay')
+        parser.add_argument('--cleanup', action='store_true', help='Delete load-test users and their orders, then exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = User.objects.filter(username__startswith=USER_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} load-test rows'))
+            return
+
+        stages = [int(n) for n in options['shoppers'].split(',')]
+        mix = parse_mix(options['mix'])
+        product_ids = list(Product.objects.values_list('id', flat=True)[:1000])
+        if not product_ids:
+            raise CommandError('No products to browse; run `manage.py seed_data` first')
+
+        self.stdout.write(
+            f"Target {options['url']}, mix {options['mix']}, think {options['think']}s, "
+            f"local CONN_MAX_AGE={settings.DATABASES['default'].get('CONN_MAX_AGE')}"
+        )
+        self.stdout.write(
+            'The server must run with LOADTEST=True RAZORPAY_CLIENT=shop.loadtest.StubRazorpayClient '
+            'and the same database as this command. Never point this at production.'
+        )
+
+        sessions = self.login_shoppers(max(stages))
+        # Otherwise this command's own idle connection counts as the server's
+        connections.close_all()
+        for shoppers in stages:
+            stats, elapsed, db_samples = run_stage(
+                options['url'],
+                sessions[:shoppers],
+                product_ids,
+                duration=options['duration'],
+                mix=mix,
+                ramp_up=options['ramp_up'],
+                razorpay_share=options['razorpay_share'],
+                think=options['think'],
+            )
+            self.report(shoppers, stats.summary(elapsed), elapsed, db_samples)
+
+    def login_shoppers(self, count):
+        # Sessions are created straight in the shared database, so the test
+        # doesn't depend on the login page
+        sessions = []
+        for i in range(count):
+            user, _ = User.objects.get_or_create(
+                username=f'{USER_PREFIX}{i}',
+                defaults={'email': f'{USER_PREFIX}{i}@example.com'},
+            )
+            # A fresh client each time: logging in again would flush the last session
+            client = Client()
+            client.force_login(user)
+            sessions.append({settings.SESSION_COOKIE_NAME: client.cookies[settings.SESSION_COOKIE_NAME].value})
+        return sessions
+
+    def report(self, shoppers, rows, elapsed, db_samples):
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{shoppers} shoppers, {elapsed:.1f}s'))
+        self.stdout.write(
+            f"{'endpoint':<16} {'requests':>8} {'req/s':>7} {'errors':>7} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        total = errors = 0
+        for row in rows:
+            total += row['requests']
+            errors += row['errors']
+            self.stdout.write(
+                f"{row['endpoint']:<16} {row['requests']:>8} {row['rps']:>7.1f} "
+                f"{row['errors'] / row['requests']:>7.1%} "
+                f"{row['p50'] * 1000:>8.1f} {row['p90'] * 1000:>8.1f} "
+                f"{row['p99'] * 1000:>8.1f} {row['max'] * 1000:>8.1f}"
+            )
+        error_rate = errors / total if total else 0.0
+        self.stdout.write(f'Total: {total} requests, {total / elapsed:.1f} req/s, {error_rate:.1%} errors')
+        if db_samples:
+            self.stdout.write(
+                f'DB connections: min {min(db_samples)}, '
+                f'avg {sum(db_samples) / len(db_samples):.1f}, max {max(db_samples)}'
+            )
+        else:
+            self.stdout.write('DB connections: not available for this database backend')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from shop.startup import measure_startup, over_budget
+
+
+class Command(BaseCommand):
+    help = 'Report import time per module and first-request latency for a cold start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='How many modules to list')
+        parser.add_argument('--path', default='/', help='URL to request after startup')
+
+    def handle(self, *args, **options):
+        result = measure_startup(path=options['path'], importtime=True)
+        imports = sorted(result['imports'], reverse=True)
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for cumulative, own, name in imports[:options['top']]:
+            self.stdout.write(f"{cumulative / 1000:>14.1f} {own / 1000:>9.1f}  {name}")
+
+        self.stdout.write('')
+        self.stdout.write(f"Modules imported: {len(result['modules'])}")
+        self.stdout.write(f"Startup: {result['startup_seconds'] * 1000:.0f} ms")
+        self.stdout.write(
+            f"First request {options['path']} ({result['status']}): "
+            f"{result['first_request_seconds'] * 1000:.0f} ms"
+        )
+        if over_budget(result):
+            self.stdout.write(self.style.WARNING('Over the startup budget'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Within the startup budget'))
+
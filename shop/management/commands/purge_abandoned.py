@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from shop.maintenance import run_in_batches
+from shop.models import Cart, Order, OrderItem
+
+STALE_STATUSES = ['pending', 'failed']
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned cart rows and mark stale pending/failed orders abandoned, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cart-ttl-days', type=int, default=30, help='Delete cart rows untouched for this long')
+        parser.add_argument(
+            '--order-ttl-days', type=int, default=7, help='Mark pending/failed orders older than this abandoned',
+        )
+        parser.add_argument('--batch', type=int, default=500, help='Rows per batch')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches per table')
+        parser.add_argument('--skip-orders', action='store_true', help='Only purge carts')
+        parser.add_argument(
+            '--purge-orders', action='store_true',
+            help='Delete abandoned orders instead of marking them. Razorpay captures payments '
+                 'automatically, so reconcile with the dashboard first or paid orders are lost',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batching = {
+            'batch_size': options['batch'],
+            'sleep': options['sleep'],
+            'max_batches': options['max_batches'],
+        }
+
+        cart_cutoff = now - timedelta(days=options['cart_ttl_days'])
+        carts = Cart.objects.filter(updated_at__lt=cart_cutoff)
+        rows, seconds = run_in_batches(
+            carts, lambda ids: self.delete_carts(ids, cart_cutoff), report=self.report('carts'), **batching,
+        )
+        self.done('Deleted', 'cart rows', rows, seconds)
+
+        if options['skip_orders']:
+            return
+
+        stale = now - timedelta(days=options['order_ttl_days'])
+        if options['purge_orders']:
+            self.stdout.write(self.style.WARNING(
+                'Deleting unpaid orders: any that were paid on Razorpay after all are lost'
+            ))
+            orders = Order.objects.filter(payment_status__in=STALE_STATUSES + ['abandoned'], created_at__lt=stale)
+            rows, seconds = run_in_batches(orders, self.delete_orders, report=self.report('orders'), **batching)
+            self.done('Deleted', 'abandoned orders', rows, seconds)
+        else:
+            # Kept rather than deleted: a late payment_success still finds the
+            # order by its razorpay_order_id and completes it
+            orders = Order.objects.filter(payment_status__in=STALE_STATUSES, created_at__lt=stale)
+            rows, seconds = run_in_batches(orders, self.abandon_orders, report=self.report('orders'), **batching)
+            self.done('Marked', 'orders abandoned', rows, seconds)
+
+    def delete_carts(self, ids, cutoff):
+        # Checked again: add_item may have touched a row since its id was read
+        deleted, _ = Cart.objects.filter(id__in=ids, updated_at__lt=cutoff).delete()
+        return deleted
+
+    def abandon_orders(self, ids):
+        return Order.objects.filter(id__in=ids, payment_status__in=STALE_STATUSES).update(
+            payment_status='abandoned',
+        )
+
+    def delete_orders(self, ids):
+        with transaction.atomic():
+            OrderItem.objects.filter(order_id__in=ids).delete()
+            deleted, _ = Order.objects.filter(id__in=ids).delete()
+        return deleted
+
+    def report(self, label):
+        def write(batches, rows, rate):
+            self.stdout.write(f'{label}: batch {batches}, {rows} rows, {rate:.0f} rows/s')
+        return write
+
+    def done(self, verb, label, rows, seconds):
+        rate = rows / seconds if seconds else 0.0
+        self.stdout.write(self.style.SUCCESS(f'{verb} {rows} {label} in {seconds:.1f}s ({rate:.0f} rows/s)'))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from shop.task_queue import prune, run_pending
+
+PRUNE_INTERVAL = 3600  # seconds
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (order emails, analytics, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain due tasks and exit')
+        parser.add_argument('--batch', type=int, default=100, help='Tasks to run between polls')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument(
+            '--prune-days', type=int, default=settings.TASK_RETENTION_DAYS,
+            help='Hourly, delete done/failed tasks older than this; 0 keeps them',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Task worker started'))
+        last_prune = None
+        while True:
+            if options['prune_days'] and (last_prune is None or time.monotonic() - last_prune >= PRUNE_INTERVAL):
+                rows, seconds = prune(options['prune_days'])
+                last_prune = time.monotonic()
+                if rows:
+                    self.stdout.write(f'Pruned {rows} finished tasks in {seconds:.1f}s')
+            count = run_pending(limit=options['batch'])
+            close_old_connections()
+            if count:
+                self.stdout.write(f'Ran {count} tasks')
+            if options['once'] and count < options['batch']:
+                break
+            if not count:
+                time.sleep(options['sleep'])
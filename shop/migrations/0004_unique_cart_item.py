@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:13
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    # Fold duplicate (user, product) rows into the oldest one before the
+    # unique constraint is added, keeping the combined quantity.
+    Cart = apps.get_model('shop', 'Cart')
+    duplicates = (
+        Cart.objects.values('user_id', 'product_id')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        Cart.objects.filter(id=dup['keep_id']).update(quantity=dup['total'])
+        Cart.objects.filter(
+            user_id=dup['user_id'], product_id=dup['product_id'],
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_order_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_cart_item'),
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
-import requests
+from django.utils import timezone
 from django.utils.text import slugify
 
 class Category(models.Model):
@@ -34,6 +35,8 @@ class Cart(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set explicitly on every change, since queryset.update() skips auto_now
+    updated_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
         return f"{self.quantity} x {self.product.title} in {self.user.username}'s cart"
@@ -41,18 +44,47 @@ class Cart(models.Model):
     def total_price(self):
         return self.quantity * self.product.price
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_cart_item'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+
+    @classmethod
+    def add_item(cls, user, product, quantity=1):
+        # Increment in the database so concurrent clicks can't lose an update.
+        # The unique constraint turns a racing insert into an IntegrityError,
+        # after which the row exists and the increment succeeds.
+        increment = {'quantity': F('quantity') + quantity, 'updated_at': timezone.now()}
+        if cls.objects.filter(user=user, product=product).update(**increment):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user=user, product=product, quantity=quantity)
+        except IntegrityError:
+            cls.objects.filter(user=user, product=product).update(**increment)
+
 class Order(models.Model):
     PAYMENT_CHOICES = [
         ('COD', 'Cash on Delivery'),
         ('RAZORPAY', 'Razorpay'),
     ]
+    PAYMENT_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('abandoned', 'Abandoned'),
+    ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     products = models.ManyToManyField(Product, through='OrderItem')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_CHOICES)
-    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
-    payment_status = models.CharField(max_length=20, default='pending')
+    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -60,6 +92,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['payment_status', 'created_at']),
+        ]
 
     def get_total_items(self):
         return sum(item.quantity for item in self.orderitem_set.all())
@@ -74,4 +111,74 @@ class OrderItem(models.Model):
         return f"{self.quantity} x {self.product.title} in Order #{self.order.id}"
 
     def total_price(self):
-        return self.quantity * self.price
\ No newline at end of file
+        return self.quantity * self.price
+
+
+# Old completed orders are moved here by `manage.py archive_orders`. They keep
+# their original ids so links and order_detail keep working.
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_CHOICES)
+    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True)
+    payment_status = models.CharField(max_length=20, choices=Order.PAYMENT_STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived order #{self.id} by {self.user.username}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    @property
+    def orderitem_set(self):
+        # Same name as on Order so templates can render either
+        return self.items
+
+    def get_total_items(self):
+        return sum(item.quantity for item in self.items.all())
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.title} in Archived order #{self.order_id}"
+
+    def total_price(self):
+        return self.quantity * self.price
+
+class Task(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=200, unique=True, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
@@ -0,0 +1,37 @@
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def check_razorpay_client():
+    """Refuse a substitute Razorpay client unless this is a load-test deployment."""
+    if not settings.RAZORPAY_CLIENT:
+        return
+    if not settings.LOADTEST:
+        raise ImproperlyConfigured(
+            f"RAZORPAY_CLIENT={settings.RAZORPAY_CLIENT} replaces the real payment gateway; "
+            "set LOADTEST=True to allow it on a load-test deployment"
+        )
+    logger.warning(
+        "LOADTEST: payments go through %s and are NOT verified by Razorpay. "
+        "Never run this configuration in production.",
+        settings.RAZORPAY_CLIENT,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_razorpay_client():
+    # Imported and built on first use so workers boot without the SDK
+    if settings.RAZORPAY_CLIENT:
+        check_razorpay_client()
+        # e.g. the load-test stub, so no real gateway calls are made
+        client_class = import_string(settings.RAZORPAY_CLIENT)
+    else:
+        from razorpay import Client as client_class
+
+    return client_class(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Runs in a fresh interpreter: boot the WSGI app, then serve one request.
+PROBE_SCRIPT = """
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from ecommerce.wsgi import application
+booted = time.perf_counter()
+
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': 'localhost'}
+setup_testing_defaults(environ)
+status = []
+body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+b''.join(body)
+if hasattr(body, 'close'):
+    body.close()
+done = time.perf_counter()
+
+print(json.dumps({
+    'startup_seconds': booted - started,
+    'first_request_seconds': done - booted,
+    'status': status[0] if status else None,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+def measure_startup(path='/', importtime=False, env=None):
+    """Boot the project in a subprocess and time startup and a first request.
+
+    ``env`` adds to the subprocess environment, e.g. a ``DATABASE_URL``.
+    With ``importtime`` the result also has ``imports``: a list of
+    ``(cumulative_us, self_us, module)`` parsed from ``python -X importtime``.
+    """
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', PROBE_SCRIPT, path]
+
+    env = {**os.environ, **(env or {})}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
+    proc = subprocess.run(
+        cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if importtime:
+        result['imports'] = parse_importtime(proc.stderr)
+    return result
+
+
+def parse_importtime(output):
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        imports.append((int(parts[1]), int(parts[0]), parts[2].strip()))
+    return imports
+
+
+def over_budget(result):
+    return (
+        result['startup_seconds'] > settings.STARTUP_BUDGET_SECONDS
+        or result['first_request_seconds'] > settings.FIRST_REQUEST_BUDGET_SECONDS
+    )
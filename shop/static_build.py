@@ -0,0 +1,64 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON = re.compile(r':\s+')
+
+
+def minify_css(text):
+    text = CSS_COMMENT.sub('', text)
+    text = CSS_SPACE.sub(' ', text)
+    text = CSS_PUNCTUATION.sub(r'\1', text)
+    text = CSS_COLON.sub(':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Deliberately conservative: whitespace and whole-line comments only, so
+    # strings and regex literals are never touched.
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise ImproperlyConfigured(f"Static file not found: {path}")
+    return Path(found).read_text(encoding='utf-8')
+
+
+def build_bundle(name, sources):
+    """Concatenate and minify ``sources`` (static paths) for bundle ``name``."""
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(read_static(src)) for src in sources) + '\n'
+    if name.endswith('.js'):
+        # Separate files with ';' so a missing trailing semicolon can't join statements
+        return ';\n'.join(minify_js(read_static(src)) for src in sources) + '\n'
+    raise ImproperlyConfigured(f"Unsupported bundle type: {name}")
+
+
+def write_bundles(dest=None):
+    """Write every bundle in STATIC_BUNDLES into STATIC_BUILD_DIR.
+
+    Returns a list of ``(name, source_bytes, bundle_bytes)``.
+    """
+    dest = Path(dest or settings.STATIC_BUILD_DIR)
+    written = []
+    for name, sources in settings.STATIC_BUNDLES.items():
+        content = build_bundle(name, sources)
+        target = dest / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding='utf-8')
+        original = sum(len(read_static(src).encode('utf-8')) for src in sources)
+        written.append((name, original, len(content.encode('utf-8'))))
+    return written
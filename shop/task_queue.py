@@ -0,0 +1,218 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .maintenance import run_in_batches
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# name -> callable, filled in by the @task decorator
+registry = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register a function so it can be enqueued by name."""
+    def decorator(f):
+        task_name = name or f"{f.__module__}.{f.__name__}"
+        f.task_name = task_name
+        f.max_attempts = max_attempts
+        registry[task_name] = f
+        return f
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(func_or_name, payload=None, idempotency_key=None, delay=0):
+    """Store a task in the queue and hand it to the configured backend.
+
+    With an ``idempotency_key`` the same task is only ever queued once, so
+    callers can safely enqueue again after a retry or a double-submit.
+    """
+    name = getattr(func_or_name, 'task_name', func_or_name)
+    func = registry.get(name)
+    if func is None:
+        raise KeyError(f"Unknown task: {name}")
+
+    if idempotency_key:
+        existing = Task.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    try:
+        with transaction.atomic():
+            queued = Task.objects.create(
+                name=name,
+                payload=payload or {},
+                idempotency_key=idempotency_key or None,
+                max_attempts=func.max_attempts or settings.TASK_MAX_ATTEMPTS,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=idempotency_key)
+
+    if settings.TASK_BACKEND == 'thread':
+        if not delay:
+            transaction.on_commit(lambda: _submit(queued.id))
+        # Delayed tasks are picked up by the pool's poller once due
+        transaction.on_commit(_get_executor)
+    elif settings.TASK_BACKEND == 'immediate' and not delay:
+        transaction.on_commit(lambda: _run_logged(queued.id))
+    return queued
+
+
+def backoff(attempts):
+    # Exponential backoff: base, 2*base, 4*base ... capped at one hour
+    return min(settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1), 3600)
+
+
+def _claimable(queryset, now):
+    # Due queued tasks, plus running tasks whose worker went quiet for longer
+    # than the visibility timeout (killed mid-task by a deploy, OOM, ...)
+    stale = now - timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT)
+    return queryset.filter(
+        Q(status='queued', run_at__lte=now) | Q(status='running', updated_at__lt=stale)
+    )
+
+
+def _claim(queryset):
+    # Flip a task to running with a conditional UPDATE so two workers never
+    # pick up the same row, even on databases without row locks.
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        candidate = _claimable(queryset, now).order_by('run_at').first()
+        if candidate is None:
+            return None
+        claimed = Task.objects.filter(
+            id=candidate.id, status=candidate.status, updated_at=candidate.updated_at,
+        ).update(
+            status='running',
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+    if not claimed:
+        return None
+    candidate.refresh_from_db()
+    return candidate
+
+
+def execute(claimed):
+    """Run a claimed task and record the outcome, rescheduling on failure."""
+    func = registry.get(claimed.name)
+    try:
+        if func is None:
+            raise KeyError(f"Unknown task: {claimed.name}")
+        if claimed.attempts > claimed.max_attempts:
+            # Reclaimed after its worker died on the final attempt
+            raise RuntimeError("Worker lost while running the task")
+        func(**claimed.payload)
+    except Exception as e:
+        claimed.last_error = f"{type(e).__name__}: {e}"
+        if claimed.attempts >= claimed.max_attempts:
+            claimed.status = 'failed'
+            logger.error("Task %s gave up after %s attempts: %s", claimed, claimed.attempts, e)
+        else:
+            claimed.status = 'queued'
+            claimed.run_at = timezone.now() + timedelta(seconds=backoff(claimed.attempts))
+            logger.warning("Task %s failed, retrying at %s: %s", claimed, claimed.run_at, e)
+        claimed.save(update_fields=['status', 'run_at', 'last_error', 'updated_at'])
+        return False
+
+    claimed.status = 'done'
+    claimed.last_error = ''
+    claimed.save(update_fields=['status', 'last_error', 'updated_at'])
+    return True
+
+
+def run_task(task_id):
+    claimed = _claim(Task.objects.filter(id=task_id))
+    if claimed is None:
+        return None
+    return execute(claimed)
+
+
+def run_pending(limit=None):
+    """Drain due tasks from the queue. Returns how many were run."""
+    count = 0
+    while limit is None or count < limit:
+        claimed = _claim(Task.objects.all())
+        if claimed is None:
+            break
+        execute(claimed)
+        count += 1
+    return count
+
+
+def prune(older_than_days, batch_size=500):
+    """Delete done and failed tasks last run more than ``older_than_days`` ago.
+
+    Their idempotency keys go with them, so keep this well past the window in
+    which the same event could be emitted again. Returns ``(rows, seconds)``.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    finished = Task.objects.filter(status__in=['done', 'failed'], updated_at__lt=cutoff)
+
+    def delete(ids):
+        # Filtered again, so a task reclaimed in the meantime is kept
+        deleted, _ = finished.filter(id__in=ids).delete()
+        return deleted
+
+    return run_in_batches(finished, delete, batch_size=batch_size)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TASK_THREAD_WORKERS,
+                thread_name_prefix='shop-task',
+            )
+            # Retries, delayed tasks and anything left over from a previous
+            # process are picked up by polling the table, not kept in memory
+            poller = threading.Thread(target=_poll, name='shop-task-poller', daemon=True)
+            poller.start()
+    return _executor
+
+
+def _poll():
+    while True:
+        try:
+            run_pending()
+        except Exception:
+            logger.exception("Task poller failed")
+        finally:
+            close_old_connections()
+        time.sleep(settings.TASK_POLL_INTERVAL)
+
+
+def _run_logged(task_id):
+    try:
+        run_task(task_id)
+    except Exception:
+        logger.exception("Task %s crashed", task_id)
+
+
+def _run_in_thread(task_id):
+    try:
+        _run_logged(task_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(task_id):
+    _get_executor().submit(_run_in_thread, task_id)
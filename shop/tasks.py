@@ -0,0 +1,61 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.urls import reverse
+
+from .models import Order
+from .task_queue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# event name -> tasks to enqueue when an order emits that event
+ORDER_EVENT_CONSUMERS = {}
+
+
+def on_order_event(*events, **task_options):
+    """Register a task as a consumer of one or more order events."""
+    def decorator(func):
+        func = task(**task_options)(func)
+        for event in events:
+            ORDER_EVENT_CONSUMERS.setdefault(event, []).append(func)
+        return func
+    return decorator
+
+
+def order_event(order, event):
+    # Keyed on order and event, so emitting the same event for an order again
+    # (a repeated payment_success, say) doesn't queue its consumers twice
+    for consumer in ORDER_EVENT_CONSUMERS.get(event, []):
+        enqueue(
+            consumer,
+            {'order_id': order.id, 'event': event},
+            idempotency_key=f"{consumer.task_name}:{order.id}:{event}",
+        )
+
+
+@on_order_event('confirmed')
+def send_order_confirmation(order_id, event):
+    order = Order.objects.select_related('user').get(id=order_id)
+    if not order.user.email:
+        return
+    send_mail(
+        subject=f"Order #{order.id} confirmed",
+        message=(
+            f"Hi {order.user.username},\n\n"
+            f"Thank you for your order! Order #{order.id} for ₹{order.total_amount} "
+            f"has been confirmed.\n\n"
+            f"View it at {settings.SITE_URL.rstrip('/')}{reverse('order_detail', args=[order.id])}"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.user.email],
+    )
+
+
+@on_order_event('confirmed', 'payment_failed')
+def record_order_analytics(order_id, event):
+    order = Order.objects.get(id=order_id)
+    logger.info(
+        "order_event event=%s order=%s method=%s amount=%s",
+        event, order.id, order.payment_method, order.total_amount,
+    )
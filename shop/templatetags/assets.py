@@ -0,0 +1,49 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from ..static_build import minify_css, read_static
+
+register = template.Library()
+
+
+def _static_url(path):
+    try:
+        return static(path)
+    except ValueError:
+        # Not collected yet, so there is no hashed name to point at
+        return settings.STATIC_URL + path
+
+
+@register.simple_tag
+def bundle_urls(name):
+    """URLs for a STATIC_BUNDLES entry.
+
+    Uses the built bundle when collectstatic has fingerprinted it, otherwise
+    falls back to the individual source files (e.g. in development).
+    """
+    sources = settings.STATIC_BUNDLES[name]
+    if settings.DEBUG or not staticfiles_storage.exists(name):
+        # build_static hasn't been run for this deploy
+        return [_static_url(src) for src in sources]
+    return [static(name)]
+
+
+@lru_cache(maxsize=None)
+def _critical_css(path):
+    return minify_css(read_static(path))
+
+
+@register.simple_tag
+def inline_css(*paths):
+    """Inline stylesheets so above-the-fold content renders without a round-trip."""
+    if settings.DEBUG:
+        css = ''.join(minify_css(read_static(path)) for path in paths)
+    else:
+        css = ''.join(_critical_css(path) for path in paths)
+    # Our own stylesheets, and escaping would break selectors like '>'
+    return mark_safe(f'<style>{css}</style>')
@@ -1,3 +1,452 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .management.commands.purge_abandoned import Command as PurgeCommand
+from .loadtest import STUB_SIGNATURE, Shopper, Stats
+from .models import ArchivedOrder, Cart, Category, Order, OrderItem, Product, Task
+from .payments import get_razorpay_client
+from .startup import measure_startup
+from .task_queue import enqueue, prune, run_pending, task
+from .tasks import send_order_confirmation
+from .static_build import build_bundle, minify_css, read_static
+from .templatetags.assets import bundle_urls
+
+
+def create_shopper():
+    """The shopper and product most tests start from: a Phone in Electronics."""
+    user = User.objects.create_user(username='shopper', password='secret', email='shopper@example.com')
+    category = Category.objects.create(name='Electronics')
+    product = Product.objects.create(title='Phone', price=100, description='', category=category)
+    return user, product
+
+
+class ShopperTestMixin:
+    """``self.user`` and ``self.product`` from create_shopper(), logged in."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user, cls.product = create_shopper()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+
+calls = []
+
+
+@task(name='shop.tests.flaky', max_attempts=2)
+def flaky(fail=False):
+    calls.append(fail)
+    if fail:
+        raise ValueError('boom')
+
+
+@override_settings(TASK_BACKEND='worker')
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key_queues_once(self):
+        first = enqueue(flaky, idempotency_key='once')
+        second = enqueue(flaky, idempotency_key='once')
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failure_is_retried_later(self):
+        queued = enqueue(flaky, {'fail': True})
+        with self.assertLogs('shop.task_queue', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'queued')
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('boom', queued.last_error)
+        # Not due yet
+        self.assertEqual(run_pending(), 0)
+
+    def test_gives_up_after_max_attempts(self):
+        queued = enqueue(flaky, {'fail': True})
+        with self.assertLogs('shop.task_queue', 'WARNING'):
+            run_pending()
+            Task.objects.filter(id=queued.id).update(run_at=timezone.now())
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'failed')
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(TASK_VISIBILITY_TIMEOUT=60)
+    def test_task_of_a_lost_worker_is_reclaimed(self):
+        queued = enqueue(flaky)
+        stale = timezone.now() - timedelta(seconds=120)
+        Task.objects.filter(id=queued.id).update(status='running', attempts=1, updated_at=stale)
+        self.assertEqual(run_pending(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'done')
+        self.assertEqual(queued.attempts, 2)
+
+    def test_prune_deletes_only_old_finished_tasks(self):
+        old = timezone.now() - timedelta(days=30)
+        done, failed, queued, recent = (enqueue(flaky) for _ in range(4))
+        Task.objects.filter(id=done.id).update(status='done', updated_at=old)
+        Task.objects.filter(id=failed.id).update(status='failed', updated_at=old)
+        Task.objects.filter(id=queued.id).update(updated_at=old)
+        Task.objects.filter(id=recent.id).update(status='done')
+
+        rows, _ = prune(older_than_days=14)
+        self.assertEqual(rows, 2)
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {queued.id, recent.id})
+
+    def test_running_task_is_not_claimed_twice(self):
+        queued = enqueue(flaky)
+        Task.objects.filter(id=queued.id).update(status='running', attempts=1)
+        self.assertEqual(run_pending(), 0)
+
+    def test_cod_checkout_queues_confirmation_email(self):
+        user, product = create_shopper()
+        Cart.add_item(user, product)
+        self.client.force_login(user)
+        self.client.post(reverse('process_order'), {'payment_method': 'COD'})
+
+        confirmations = Task.objects.filter(name=send_order_confirmation.task_name)
+        self.assertEqual(confirmations.count(), 1)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(f'{settings.SITE_URL}/orders/', mail.outbox[0].body)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A migrated scratch database, so the first request is the real home
+        # page: a database connection, the session, templates and context processors
+        scratch = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(scratch.cleanup)
+        env = {'DATABASE_URL': f"sqlite:///{os.path.join(scratch.name, 'db.sqlite3')}"}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '--noinput', '-v', '0'],
+            cwd=settings.BASE_DIR, env={**os.environ, **env}, check=True,
+        )
+        cls.result = measure_startup(path=reverse('home'), env=env)
+
+    def test_startup_within_budget(self):
+        self.assertLess(self.result['startup_seconds'], settings.STARTUP_BUDGET_SECONDS)
+
+    def test_first_request_within_budget(self):
+        self.assertEqual(self.result['status'], '200 OK')
+        for module in ('django.db.backends.sqlite3.base', 'shop.context_processors'):
+            self.assertIn(module, self.result['modules'])
+        self.assertLess(self.result['first_request_seconds'], settings.FIRST_REQUEST_BUDGET_SECONDS)
+
+    def test_optional_integrations_are_lazy(self):
+        for module in ('razorpay', 'requests'):
+            self.assertNotIn(module, self.result['modules'])
+
+
+class StaticBuildTests(SimpleTestCase):
+    def test_minify_css(self):
+        css = "/* theme */\n.navbar > .brand {\n    color: #fff;\n    padding: 0 1rem;\n}\n"
+        self.assertEqual(minify_css(css), ".navbar>.brand{color:#fff;padding:0 1rem}")
+
+    def test_css_bundle_concatenates_sources(self):
+        bundle = build_bundle('build/app.css', ['css/base.css', 'css/critical/home.css'])
+        self.assertIn('.quantity-input{', bundle)
+        self.assertIn('.display-5{', bundle)
+        self.assertNotIn('/*', bundle)
+
+    @override_settings(DEBUG=True)
+    def test_bundle_urls_use_sources_in_development(self):
+        self.assertEqual(bundle_urls('build/app.css'), [settings.STATIC_URL + 'css/base.css'])
+
+
+class CriticalCssTests(TestCase):
+    def test_pages_inline_the_theme_from_base_css(self):
+        _, product = create_shopper()
+        theme = minify_css(read_static('css/base.css'))
+        for url in (reverse('home'), reverse('product_detail', args=[product.id])):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), theme)
+
+
+class CartTests(ShopperTestMixin, TestCase):
+    def test_add_to_cart_increments_single_row(self):
+        for _ in range(3):
+            self.client.post(reverse('add_to_cart', args=[self.product.id]))
+        item = Cart.objects.get(user=self.user, product=self.product)
+        self.assertEqual(item.quantity, 3)
+
+    def test_update_cart_sets_quantity_and_removes_at_zero(self):
+        Cart.add_item(self.user, self.product)
+        item = Cart.objects.get(user=self.user)
+        self.client.post(reverse('update_cart', args=[item.id]), {'quantity': 4})
+        self.assertEqual(Cart.objects.get(id=item.id).quantity, 4)
+        self.client.post(reverse('update_cart', args=[item.id]), {'quantity': 0})
+        self.assertFalse(Cart.objects.filter(id=item.id).exists())
+
+    def test_update_cart_of_another_user_is_404(self):
+        other = User.objects.create_user(username='other', password='secret')
+        Cart.add_item(other, self.product)
+        item = Cart.objects.get(user=other)
+        response = self.client.post(reverse('update_cart', args=[item.id]), {'quantity': 4})
+        self.assertEqual(response.status_code, 404)
+
+
+class MaintenanceCommandTests(ShopperTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.case = Product.objects.create(title='Case', price=10, description='', category=cls.product.category)
+
+    def order(self, status, days_ago):
+        order = Order.objects.create(user=self.user, total_amount=100, payment_method='COD', payment_status=status)
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, price=100)
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return order
+
+    def test_purge_goes_by_last_cart_change(self):
+        Cart.add_item(self.user, self.product)
+        Cart.add_item(self.user, self.case)
+        Cart.objects.update(created_at=timezone.now() - timedelta(days=60),
+                            updated_at=timezone.now() - timedelta(days=60))
+        Cart.add_item(self.user, self.product)
+
+        call_command('purge_abandoned', '--skip-orders', stdout=StringIO())
+        self.assertEqual(list(Cart.objects.values_list('product', flat=True)), [self.product.id])
+
+    def test_purge_keeps_cart_touched_after_it_was_read(self):
+        Cart.add_item(self.user, self.product)
+        Cart.objects.update(updated_at=timezone.now() - timedelta(days=60))
+        ids = list(Cart.objects.values_list('id', flat=True))
+        Cart.add_item(self.user, self.product)
+
+        deleted = PurgeCommand().delete_carts(ids, timezone.now() - timedelta(days=30))
+        self.assertEqual(deleted, 0)
+        self.assertEqual(Cart.objects.get().quantity, 2)
+
+    def test_purge_marks_stale_orders_abandoned(self):
+        stale = self.order('pending', days_ago=10)
+        recent = self.order('pending', days_ago=1)
+        paid = self.order('completed', days_ago=10)
+
+        call_command('purge_abandoned', stdout=StringIO())
+        statuses = dict(Order.objects.values_list('id', 'payment_status'))
+        self.assertEqual(statuses, {stale.id: 'abandoned', recent.id: 'pending', paid.id: 'completed'})
+
+    def test_purge_orders_deletes_only_when_asked(self):
+        stale = self.order('failed', days_ago=10)
+        call_command('purge_abandoned', '--purge-orders', stdout=StringIO())
+        self.assertFalse(Order.objects.filter(id=stale.id).exists())
+        self.assertFalse(OrderItem.objects.filter(order_id=stale.id).exists())
+
+    def test_archive_moves_old_completed_orders(self):
+        old = self.order('completed', days_ago=400)
+        pending = self.order('pending', days_ago=400)
+
+        call_command('archive_orders', '--batch', '1', stdout=StringIO())
+        self.assertEqual(list(Order.objects.values_list('id', flat=True)), [pending.id])
+        archived = ArchivedOrder.objects.get(id=old.id)
+        self.assertEqual(archived.get_total_items(), 1)
+        self.assertEqual(archived.payment_status, 'completed')
+
+    def test_order_history_merges_archive_by_date(self):
+        archived = self.order('completed', days_ago=400)
+        oldest = self.order('pending', days_ago=500)
+        newest = self.order('completed', days_ago=1)
+        call_command('archive_orders', stdout=StringIO())
+
+        response = self.client.get(reverse('order_history'))
+        self.assertEqual([order.id for order in response.context['orders']], [newest.id, archived.id, oldest.id])
+
+    @mock.patch('shop.views.ORDERS_PER_PAGE', 2)
+    def test_order_history_is_paginated(self):
+        for days_ago in range(3):
+            self.order('completed', days_ago=400 + days_ago)
+        call_command('archive_orders', stdout=StringIO())
+        latest = self.order('pending', days_ago=0)
+
+        first = self.client.get(reverse('order_history'))
+        second = self.client.get(reverse('order_history'), {'page': 2})
+        self.assertEqual(first.context['orders'][0].id, latest.id)
+        self.assertEqual(first.context['orders'].paginator.count, 4)
+        self.assertEqual(len(second.context['orders']), 2)
+        self.assertIsInstance(second.context['orders'][1], ArchivedOrder)
+
+    def test_order_detail_reads_archive(self):
+        order = self.order('completed', days_ago=400)
+        call_command('archive_orders', stdout=StringIO())
+        response = self.client.get(reverse('order_detail', args=[order.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Phone')
+
+
+class ConcurrentCartTests(TransactionTestCase):
+    threads = 8
+    clicks = 25
+
+    def test_concurrent_clicks_keep_every_increment(self):
+        user, product = create_shopper()
+        errors = []
+        start = threading.Barrier(self.threads)
+
+        def click():
+            try:
+                start.wait()
+                for _ in range(self.clicks):
+                    Cart.add_item(user, product)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=click) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Cart.objects.filter(user=user, product=product).count(), 1)
+        self.assertEqual(Cart.objects.get(user=user, product=product).quantity, self.threads * self.clicks)
+
+
+class OrderAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='secret')
+        cls.first, _, _ = [
+            Order.objects.create(user=cls.admin, total_amount=10, payment_method='COD', payment_status=status)
+            for status in ('completed', 'pending', 'failed')
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    @override_settings(ADMIN_COUNT_LIMIT=2)
+    def test_pages_past_a_capped_count_still_render(self):
+        url = reverse('admin:shop_order_changelist')
+        with mock.patch.object(admin.site._registry[Order], 'list_per_page', 1):
+            response = self.client.get(url, {'p': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order.id for order in response.context['cl'].result_list], [self.first.id])
+        self.assertContains(response, '2+ orders')
+        self.assertContains(response, '?p=4')
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        url = reverse('admin:shop_order_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for i in range(5):
+            customer = User.objects.create_user(username=f'customer{i}')
+            Order.objects.create(user=customer, total_amount=1, payment_method='COD')
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertEqual(len(after), len(before))
+        self.assertContains(response, 'created_at__year=')
+
+
+@override_settings(RAZORPAY_CLIENT='shop.loadtest.StubRazorpayClient', LOADTEST=True, TASK_BACKEND='worker')
+class StubPaymentTests(ShopperTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_razorpay_client.cache_clear()
+        self.addCleanup(get_razorpay_client.cache_clear)
+        with self.assertLogs('shop.payments', 'WARNING'):
+            get_razorpay_client()
+        Cart.add_item(self.user, self.product)
+
+    def pay(self, signature):
+        self.client.post(reverse('process_order'), {'payment_method': 'upi'})
+        order = Order.objects.get(user=self.user)
+        response = self.confirm(order, signature)
+        order.refresh_from_db()
+        return response, order
+
+    def confirm(self, order, signature):
+        return self.client.post(reverse('payment_success'), json.dumps({
+            'razorpay_order_id': order.razorpay_order_id,
+            'razorpay_payment_id': 'pay_test',
+            'razorpay_signature': signature,
+        }), content_type='application/json')
+
+    def test_checkout_completes_against_stub_gateway(self):
+        response, order = self.pay(STUB_SIGNATURE)
+        self.assertEqual(response.json(), {'status': 'success'})
+        self.assertEqual(order.payment_status, 'completed')
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+    def test_repeated_payment_success_confirms_once(self):
+        response, order = self.pay(STUB_SIGNATURE)
+        self.confirm(order, STUB_SIGNATURE)
+        confirmations = Task.objects.filter(name=send_order_confirmation.task_name)
+        self.assertEqual(confirmations.count(), 1)
+
+    def test_bad_signature_fails_payment(self):
+        response, order = self.pay('forged')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(order.payment_status, 'failed')
+
+    @override_settings(LOADTEST=False)
+    def test_stub_is_refused_outside_load_tests(self):
+        get_razorpay_client.cache_clear()
+        with self.assertRaises(ImproperlyConfigured):
+            get_razorpay_client()
+
+
+class IdleClosingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Drops keep-alive connections idle this long, like gunicorn/uvicorn do
+    timeout = 0.1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class ShopperTests(SimpleTestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), IdleClosingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.stats = Stats()
+        self.shopper = Shopper(f'http://127.0.0.1:{self.server.server_port}', {}, [1], self.stats, 0, {'browse': 1})
+
+    def test_idle_connection_closed_by_server_is_not_an_error(self):
+        self.assertEqual(self.shopper.request('home', 'GET', '/')[0], 200)
+        time.sleep(0.3)
+        self.assertEqual(self.shopper.request('home', 'GET', '/')[0], 200)
+        self.assertEqual(self.stats.errors, {})
+
+    def test_unreachable_server_is_an_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(self.shopper.request('home', 'GET', '/'), (None, b''))
+        self.assertEqual(self.stats.errors, {'home': 1})
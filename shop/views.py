@@ -1,18 +1,23 @@
+import heapq
+from itertools import islice
+
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from .models import Product, Category, Cart, Order, OrderItem
+from django.http import Http404, JsonResponse
+from .models import Product, Category, Cart, Order, OrderItem, ArchivedOrder
 from .forms import SignUpForm, LoginForm, CheckoutForm
-import requests
-import razorpay
+from .tasks import order_event
+from .payments import get_razorpay_client
 from django.conf import settings
+from django.db import transaction
 import json
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
+from django.utils import timezone
 
-# Initialize Razorpay client
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+ORDERS_PER_PAGE = 20
 
 def home(request):
     # Get all products and categories
@@ -46,14 +51,7 @@ def product_detail(request, product_id):
 @login_required
 def add_to_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    cart_item, created = Cart.objects.get_or_create(
-        user=request.user,
-        product=product,
-        defaults={'quantity': 1}
-    )
-    if not created:
-        cart_item.quantity += 1
-        cart_item.save()
+    Cart.add_item(request.user, product)
     return redirect('cart')
 
 @login_required
@@ -65,13 +63,15 @@ def remove_from_cart(request, cart_id):
 @login_required
 def update_cart(request, cart_id):
     if request.method == 'POST':
-        cart_item = get_object_or_404(Cart, id=cart_id, user=request.user)
+        cart_item = Cart.objects.filter(id=cart_id, user=request.user)
         quantity = int(request.POST.get('quantity', 1))
+        # Single UPDATE/DELETE so a double-submit can't race a read-modify-write
         if quantity > 0:
-            cart_item.quantity = quantity
-            cart_item.save()
+            changed = cart_item.update(quantity=quantity, updated_at=timezone.now())
         else:
-            cart_item.delete()
+            changed, _ = cart_item.delete()
+        if not changed:
+            raise Http404("No Cart matches the given query.")
     return redirect('cart')
 
 @login_required
@@ -112,7 +112,7 @@ def checkout(request):
                 )
             
             # Create Razorpay order
-            razorpay_order = client.order.create({
+            razorpay_order = get_razorpay_client().order.create({
                 'amount': int(total * 100),  # Razorpay expects amount in paise
                 'currency': 'INR',
                 'receipt': f'order_{order.id}',
@@ -160,18 +160,24 @@ def payment_success(request):
             }
             
             try:
-                client.utility.verify_payment_signature(params_dict)
+                get_razorpay_client().utility.verify_payment_signature(params_dict)
+            except Exception:
+                with transaction.atomic():
+                    order.payment_status = 'failed'
+                    order.save()
+                    order_event(order, 'payment_failed')
+                return JsonResponse({'status': 'signature_verification_failed'}, status=400)
+            
+            # Status change, cart clearing and the event commit together
+            with transaction.atomic():
                 order.payment_status = 'completed'
                 order.save()
                 
                 # Clear the cart
                 Cart.objects.filter(user=request.user).delete()
                 
-                return JsonResponse({'status': 'success'})
-            except:
-                order.payment_status = 'failed'
-                order.save()
-                return JsonResponse({'status': 'signature_verification_failed'}, status=400)
+                order_event(order, 'confirmed')
+            return JsonResponse({'status': 'success'})
         except Order.DoesNotExist:
             return JsonResponse({'status': 'order_not_found'}, status=404)
     
@@ -214,25 +220,27 @@ def process_order(request):
         payment_method = request.POST.get('payment_method', 'COD')
 
         if payment_method == 'COD':
-            # Create order for COD
-            order = Order.objects.create(
-                user=request.user,
-                total_amount=total,
-                payment_method=payment_method,
-                payment_status='confirmed'
-            )
-            
-            # Create order items
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    price=item.product.price
+            with transaction.atomic():
+                # Create order for COD
+                order = Order.objects.create(
+                    user=request.user,
+                    total_amount=total,
+                    payment_method=payment_method,
+                    payment_status='confirmed'
                 )
-            
-            # Clear the cart
-            cart_items.delete()
+                
+                # Create order items
+                for item in cart_items:
+                    OrderItem.objects.create(
+                        order=order,
+                        product=item.product,
+                        quantity=item.quantity,
+                        price=item.product.price
+                    )
+                
+                # Clear the cart
+                cart_items.delete()
+                order_event(order, 'confirmed')
             return render(request, 'shop/order_confirmation.html', {
                 'order': order,
                 'order_detail_url': reverse('order_detail', args=[order.id])
@@ -256,7 +264,7 @@ def process_order(request):
             )
         
         # Create Razorpay order
-        razorpay_order = client.order.create({
+        razorpay_order = get_razorpay_client().order.create({
             'amount': int(total * 100),
             'currency': 'INR',
             'receipt': f'order_{order.id}',
@@ -280,10 +288,38 @@ def process_order(request):
 
 @login_required
 def order_history(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'shop/order_history.html', {'orders': orders})
+    orders = OrderTimeline(
+        Order.objects.filter(user=request.user).prefetch_related('orderitem_set'),
+        ArchivedOrder.objects.filter(user=request.user).prefetch_related('items'),
+    )
+    page = Paginator(orders, ORDERS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'shop/order_history.html', {'orders': page})
+
+class OrderTimeline:
+    """Several order querysets merged newest first, sliceable for Paginator.
+
+    Only completed orders get archived, so a pending order can be older than
+    an archived one; the tables are merged on created_at rather than chained.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = [qs.order_by('-created_at', '-id') for qs in querysets]
+
+    def count(self):
+        return sum(qs.count() for qs in self.querysets)
+
+    def __getitem__(self, index):
+        # Every row of the slice is within the first `stop` rows of its own table
+        rows = heapq.merge(
+            *(qs[:index.stop] for qs in self.querysets),
+            key=lambda order: (order.created_at, order.id),
+            reverse=True,
+        )
+        return list(islice(rows, index.start, index.stop))
 
 @login_required
 def order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = Order.objects.filter(id=order_id, user=request.user).first()
+    if order is None:
+        order = get_object_or_404(ArchivedOrder, id=order_id, user=request.user)
     return render(request, 'shop/order_detail.html', {'order': order})
\ No newline at end of file